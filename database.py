@@ -5,16 +5,22 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import WriteConcern
+from bson import ObjectId
 from datetime import datetime, timezone
+import asyncio
+import logging
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import Iterable, Optional, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 _client = None
 db = None
 
@@ -22,15 +28,21 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    # Pre-warm a pool of connections so the first requests don't pay the handshake
+    _client = AsyncIOMotorClient(database_url, maxPoolSize=50, minPoolSize=10)
     db = _client[database_name]
 
-# Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
-    """Insert a single document with timestamp"""
-    if db is None:
-        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+# Bulk writer settings: max documents per insert_many and how long to coalesce
+BULK_BATCH_SIZE = 1000
+BULK_FLUSH_INTERVAL = 0.01
+# Cap on queued documents so a slow or unreachable DB can't grow memory without bound
+BULK_QUEUE_MAXSIZE = 10000
 
+_insert_queue: Optional[asyncio.Queue] = None
+_insert_worker: Optional[asyncio.Task] = None
+
+def _prepare_document(data: Union[BaseModel, dict]) -> dict:
+    """Convert to a plain dict and stamp created_at/updated_at"""
     # Convert Pydantic model to dict if needed
     if isinstance(data, BaseModel):
         data_dict = data.model_dump()
@@ -39,11 +51,98 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
 
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
+    return data_dict
+
+# Helper functions for common database operations
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
+    """Insert a single document with timestamp"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    data_dict = _prepare_document(data)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+async def create_documents(collection_name: str, items: Iterable[Union[BaseModel, dict]]):
+    """Insert many documents with timestamps in a single unordered round-trip"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    docs = [_prepare_document(d) for d in items]
+    if not docs:
+        return []
+
+    result = await db[collection_name].insert_many(docs, ordered=False)
+    return [str(i) for i in result.inserted_ids]
+
+def enqueue_document(collection_name: str, data: Union[BaseModel, dict]):
+    """Queue a document for the background bulk writer and return its pre-assigned id.
+
+    Writes are unacknowledged (w=0): use only for paths that can tolerate loss.
+    Raises asyncio.QueueFull once BULK_QUEUE_MAXSIZE documents are pending.
+    """
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    if _insert_queue is None:
+        raise Exception("Bulk writer not running. Call start_bulk_writer() on startup.")
+
+    data_dict = _prepare_document(data)
+    data_dict['_id'] = ObjectId()
+    _insert_queue.put_nowait((collection_name, data_dict))
+    return str(data_dict['_id'])
+
+async def _write_batch(batch: list):
+    """Issue one unacknowledged insert_many per collection in the batch"""
+    by_collection = {}
+    for collection_name, doc in batch:
+        by_collection.setdefault(collection_name, []).append(doc)
+    for collection_name, docs in by_collection.items():
+        coll = db[collection_name].with_options(write_concern=WriteConcern(w=0))
+        try:
+            await coll.insert_many(docs, ordered=False)
+        except Exception:
+            logger.exception("Bulk insert of %d documents into %s failed", len(docs), collection_name)
+
+async def _bulk_writer():
+    """Drain the insert queue in batches of up to BULK_BATCH_SIZE every BULK_FLUSH_INTERVAL"""
+    while True:
+        item = await _insert_queue.get()
+        if item is None:
+            return
+        batch = [item]
+        await asyncio.sleep(BULK_FLUSH_INTERVAL)
+        stop = False
+        while len(batch) < BULK_BATCH_SIZE and not _insert_queue.empty():
+            item = _insert_queue.get_nowait()
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        await _write_batch(batch)
+        if stop:
+            return
+
+def start_bulk_writer():
+    """Start the background task that flushes enqueued documents"""
+    global _insert_queue, _insert_worker
+    if db is None or _insert_worker is not None:
+        return
+    _insert_queue = asyncio.Queue(maxsize=BULK_QUEUE_MAXSIZE)
+    _insert_worker = asyncio.create_task(_bulk_writer())
+
+async def flush_bulk_writer():
+    """Write out everything still queued and stop the background writer"""
+    global _insert_queue, _insert_worker
+    if _insert_worker is None:
+        return
+    # Sentinel goes in behind any pending documents, so they are written first
+    await _insert_queue.put(None)
+    await _insert_worker
+    _insert_queue = None
+    _insert_worker = None
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
     """Get documents from collection"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -52,4 +151,37 @@ def get_documents(collection_name: str, filter_dict: dict = None, limit: int = N
     if limit:
         cursor = cursor.limit(limit)
     
-    return list(cursor)
+    return await cursor.to_list(length=None)
+
+def _list_pipeline(filter_dict: dict = None, sort: dict = None) -> list:
+    """$match/$sort pipeline that exposes `_id` as string `id`"""
+    pipeline = [{"$match": filter_dict or {}}]
+    if sort:
+        pipeline.append({"$sort": sort})
+    pipeline.append({"$addFields": {"id": {"$toString": "$_id"}}})
+    pipeline.append({"$project": {"_id": 0}})
+    return pipeline
+
+def stream_documents(collection_name: str, filter_dict: dict = None, sort: dict = None):
+    """Get documents via an aggregation pipeline, sorted server-side with `_id` exposed as string `id`.
+
+    Returns the async cursor so documents can be consumed one at a time.
+    """
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    return db[collection_name].aggregate(_list_pipeline(filter_dict, sort))
+
+async def ensure_indexes():
+    """Create the indexes backing the list endpoints' filters and sort orders.
+
+    Failures are logged rather than raised so the API still comes up without the database.
+    """
+    if db is None:
+        return
+    try:
+        await db["task"].create_index([("energy", 1), ("priority", -1)])
+        await db["task"].create_index([("priority", -1)])
+        await db["moodlog"].create_index([("created_at", -1)])
+    except Exception:
+        logger.exception("Index creation failed; list endpoints will run unindexed")
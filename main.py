@@ -1,13 +1,70 @@
+import asyncio
 import os
-from fastapi import FastAPI, HTTPException
+import re
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Literal
-from database import db, create_document, get_documents
-from schemas import Task, MoodLog
-import requests
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.datastructures import Headers
+from pydantic import BaseModel, TypeAdapter
+from typing import AsyncIterable, List, Optional, Literal
+from database import (
+    db,
+    create_document,
+    create_documents,
+    enqueue_document,
+    stream_documents,
+    ensure_indexes,
+    start_bulk_writer,
+    flush_bulk_writer,
+)
+from schemas import (
+    Task,
+    MoodLog,
+    CATEGORIES,
+    ENERGY_CODES,
+    CATEGORY_CODES,
+    ENERGY_NAMES,
+    CATEGORY_NAMES,
+)
+import httpx
+import orjson
+
+try:
+    import ahocorasick
+except ImportError:  # optional accelerator, regex fallback below
+    ahocorasick = None
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:  # optional accelerator, plain Python scoring below
+    _NUMBA_AVAILABLE = False
 
-app = FastAPI(title="BrainDash API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client for all outbound AI calls: keepalive + HTTP/2 multiplexing
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100),
+        timeout=httpx.Timeout(10.0),
+    )
+    # In the background: an unreachable DB would otherwise hold startup for the selection timeout
+    app.state.index_task = asyncio.create_task(ensure_indexes())
+    start_bulk_writer()
+    yield
+    await flush_bulk_writer()
+    await app.state.http.aclose()
+
+app = FastAPI(
+    title="BrainDash API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,13 +74,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class NDJSONAwareGZipMiddleware(GZipMiddleware):
+    """Gzip, except for NDJSON streams: the compressor holds output back, defeating per-line streaming."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and NDJSON_MEDIA_TYPE in Headers(scope=scope).get("accept", ""):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# minimum_size only applies to single-message bodies; the streamed JSON list envelopes are
+# always compressed, and arrive in compressor-sized blocks rather than per document
+app.add_middleware(NDJSONAwareGZipMiddleware, minimum_size=1024)
+
 # Environment
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+GEMINI_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# /test reuses the collection listing for this long so health checks don't hit the DB every time
+PROBE_TTL_SECONDS = 5.0
+_probe_cache = {"t": 0.0, "val": None}
+
+# Upper bound on /api/tasks/bulk, kept under the outbound HTTP pool size for concurrent AI calls
+MAX_BULK_TASKS = 50
+
+# Built once; dumps Task to JSON-ready primitives. Routes return ORJSONResponse directly so
+# FastAPI skips its jsonable_encoder pass over the body
+TASK_ADAPTER = TypeAdapter(Task)
 
 class TaskInput(BaseModel):
     text: str
     mood: Optional[str] = None
     energy: Optional[Literal["low", "medium", "high"]] = None
+    fast_insert: bool = False
 
 class MoodInput(BaseModel):
     mood: str
@@ -31,11 +117,11 @@ class MoodInput(BaseModel):
     notes: Optional[str] = None
 
 @app.get("/")
-def root():
+async def root():
     return {"app": "BrainDash API", "status": "ok"}
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -48,7 +134,12 @@ def test_database():
         if db is not None:
             response["database"] = "✅ Available"
             try:
-                collections = db.list_collection_names()
+                now = time.monotonic()
+                if _probe_cache["val"] is not None and now - _probe_cache["t"] < PROBE_TTL_SECONDS:
+                    collections = _probe_cache["val"]
+                else:
+                    collections = await db.list_collection_names()
+                    _probe_cache["t"], _probe_cache["val"] = now, collections
                 response["collections"] = collections
                 response["connection_status"] = "Connected"
                 response["database"] = "✅ Connected & Working"
@@ -62,52 +153,178 @@ def test_database():
 
 # --- AI helper ---
 
-def call_gemini_categorize(text: str, mood: Optional[str], energy: Optional[str]):
+# Heuristic keyword flags, OR-ed together from a single scan of the task text
+KW_ADMIN = 1 << 0
+KW_DEEP = 1 << 1
+KW_CREATIVE = 1 << 2
+KW_SOCIAL = 1 << 3
+KW_URGENT = 1 << 4
+KW_TODAY = 1 << 5
+KW_TOMORROW = 1 << 6
+KW_HIGH_ENERGY = 1 << 7
+KW_LOW_ENERGY = 1 << 8
+
+# Keyword groups, lowercased once here; the text is lowercased per call. Substring matches count.
+ADMIN_KW = ("email", "invoice", "schedule", "book", "call")
+DEEP_KW = ("write", "design", "analy", "plan")
+CREATIVE_KW = ("brainstorm", "sketch", "compose")
+SOCIAL_KW = ("meet", "coffee", "chat")
+URGENT_KW = ("today", "urgent", "asap", "now")
+HIGH_ENERGY_KW = ("write", "design", "clean", "gym")
+LOW_ENERGY_KW = ("email", "sort", "file")
+
+def _keyword_flags() -> dict:
+    """Fold the keyword groups into one keyword -> flags table for the scanner."""
+    table = {}
+    for keywords, flag in (
+        (ADMIN_KW, KW_ADMIN),
+        (DEEP_KW, KW_DEEP),
+        (CREATIVE_KW, KW_CREATIVE),
+        (SOCIAL_KW, KW_SOCIAL),
+        (URGENT_KW, KW_URGENT),
+        (("today",), KW_TODAY),
+        (("tomorrow",), KW_TOMORROW),
+        (HIGH_ENERGY_KW, KW_HIGH_ENERGY),
+        (LOW_ENERGY_KW, KW_LOW_ENERGY),
+    ):
+        for keyword in keywords:
+            keyword = keyword.lower()
+            table[keyword] = table.get(keyword, 0) | flag
+    return table
+
+HEURISTIC_KEYWORDS = _keyword_flags()
+
+def _build_keyword_scanner():
+    """Compile HEURISTIC_KEYWORDS into a one-pass substring matcher returning the OR of matched flags."""
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for keyword, flags in HEURISTIC_KEYWORDS.items():
+            automaton.add_word(keyword, flags)
+        automaton.make_automaton()
+
+        def scan(t: str) -> int:
+            found = 0
+            for _, flags in automaton.iter(t):
+                found |= flags
+            return found
+        return scan
+
+    # Zero-width lookahead so overlapping keywords are all reported, like Aho-Corasick
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, HEURISTIC_KEYWORDS)) + "))")
+
+    def scan(t: str) -> int:
+        found = 0
+        for m in pattern.finditer(t):
+            found |= HEURISTIC_KEYWORDS[m.group(1)]
+        return found
+    return scan
+
+scan_keywords = _build_keyword_scanner()
+
+def _score(urgency: int, energy_req_code: int, user_energy_code: int) -> int:
+    """Composite priority 0-100 from urgency and the energy match (ENERGY_CODES, -1 = not given)."""
+    base = 50
+    if urgency == 3:
+        base += 10
+    elif urgency == 2:
+        base += 5
+    if user_energy_code >= 0 and energy_req_code == user_energy_code:
+        base += 10
+    return max(0, min(100, base))
+
+if _NUMBA_AVAILABLE:
+    _score = njit(cache=True)(_score)
+    _score(1, 1, -1)  # compile now rather than on the first request
+
+HEURISTIC_TIPS = (
+    "Break it into a 10-minute starter step.",
+    "Set a 20-minute timer and start.",
+    "Pair it with music that matches your energy.",
+)
+
+@lru_cache(maxsize=4096)
+def _categorize_cached(t: str, energy: Optional[str]) -> tuple:
+    """Heuristic (category, urgency, energy, priority, due) for lowercased text; mood does not affect it."""
+    found = scan_keywords(t)
+    category = (
+        "admin" if found & KW_ADMIN else
+        "deep" if found & KW_DEEP else
+        "creative" if found & KW_CREATIVE else
+        "social" if found & KW_SOCIAL else
+        "other"
+    )
+    urgency = 3 if found & KW_URGENT else (2 if found & KW_TOMORROW else 1)
+    energy_req = "high" if found & KW_HIGH_ENERGY else ("low" if found & KW_LOW_ENERGY else "medium")
+    priority = _score(urgency, ENERGY_CODES[energy_req], ENERGY_CODES.get(energy, -1))
+    due = "today" if found & KW_TODAY else ("tomorrow" if found & KW_TOMORROW else None)
+    return category, urgency, energy_req, priority, due
+
+GEMINI_PROMPT = """Categorize this task for a productivity app and reply with JSON only:
+{{"category": one of {categories}, "urgency": 0-3, "energy": "low"|"medium"|"high",
+"priority": 0-100, "tips": [up to 3 short strings], "due": "today"|"tomorrow"|date string|null}}
+User mood: {mood}. User energy: {energy}.
+Task: {text}"""
+
+def categorize_heuristic(text: str, energy: Optional[str]) -> dict:
+    """Keyword heuristic used when no Gemini key is configured, and as defaults for Gemini output."""
+    category, urgency, energy_req, priority, due = _categorize_cached(text.lower(), energy)
+    return {
+        "category": category,
+        "urgency": urgency,
+        "energy": energy_req,
+        "priority": priority,
+        "tips": list(HEURISTIC_TIPS),
+        "due": due,
+    }
+
+def _merge_ai_fields(base: dict, ai) -> dict:
+    """Overlay Gemini's answer on the heuristic result, keeping only values valid for the Task schema."""
+    if not isinstance(ai, dict):
+        return base
+    if ai.get("category") in CATEGORIES:
+        base["category"] = ai["category"]
+    if isinstance(ai.get("energy"), str) and ai["energy"] in ENERGY_CODES:
+        base["energy"] = ai["energy"]
+    # type() rather than isinstance(): JSON true/false would otherwise pass as int
+    if type(ai.get("urgency")) is int and 0 <= ai["urgency"] <= 3:
+        base["urgency"] = ai["urgency"]
+    if type(ai.get("priority")) is int and 0 <= ai["priority"] <= 100:
+        base["priority"] = ai["priority"]
+    if isinstance(ai.get("tips"), list) and all(isinstance(t, str) for t in ai["tips"]):
+        base["tips"] = ai["tips"][:3]
+    if "due" in ai and (ai["due"] is None or isinstance(ai["due"], str)):
+        base["due"] = ai["due"]
+    return base
+
+async def call_gemini_categorize(text: str, mood: Optional[str], energy: Optional[str]):
     """Call Gemini API to categorize and score a task. Fallbacks to simple heuristics if key missing."""
+    result = categorize_heuristic(text, energy)
     if not GEMINI_API_KEY:
-        # Heuristic fallback
-        t = text.lower()
-        category = (
-            "admin" if any(k in t for k in ["email", "invoice", "schedule", "book", "call"]) else
-            "deep" if any(k in t for k in ["write", "design", "analy", "plan"]) else
-            "creative" if any(k in t for k in ["brainstorm", "sketch", "compose"]) else
-            "social" if any(k in t for k in ["meet", "coffee", "chat"]) else
-            "other"
-        )
-        urgency = 3 if any(k in t for k in ["today", "urgent", "asap", "now"]) else (2 if "tomorrow" in t else 1)
-        energy_req = "high" if any(k in t for k in ["write", "design", "clean", "gym"]) else ("low" if any(k in t for k in ["email", "sort", "file"]) else "medium")
-        base = 50 + (10 if urgency==3 else 0) + (5 if urgency==2 else 0)
-        if energy and energy_req == energy:
-            base += 10
-        priority = max(0, min(100, base))
-        tips = [
-            "Break it into a 10-minute starter step.",
-            "Set a 20-minute timer and start.",
-            "Pair it with music that matches your energy.",
-        ]
-        due = "today" if "today" in t else ("tomorrow" if "tomorrow" in t else None)
-        return {
-            "category": category,
-            "urgency": urgency,
-            "energy": energy_req,
-            "priority": priority,
-            "tips": tips,
-            "due": due,
-        }
-    # If we had a key, we'd call Gemini here. Keeping placeholder stub to avoid runtime errors.
-    return call_gemini_categorize.__wrapped__(text, mood, energy)  # type: ignore
+        return result
 
-# --- Routes ---
+    prompt = GEMINI_PROMPT.format(categories=", ".join(CATEGORIES), mood=mood, energy=energy, text=text)
+    resp = await app.state.http.post(
+        GEMINI_URL,
+        headers={"x-goog-api-key": GEMINI_API_KEY},
+        json={
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {"responseMimeType": "application/json"},
+        },
+    )
+    resp.raise_for_status()
+    answer = resp.json()["candidates"][0]["content"]["parts"][0]["text"]
+    return _merge_ai_fields(result, orjson.loads(answer))
 
-@app.post("/api/tasks")
-def create_task(task: TaskInput):
-    """Create a task from natural language, categorize via AI/heuristic, and store."""
+async def build_task(task: TaskInput) -> Task:
+    """Categorize via AI/heuristic and build the Task document."""
     try:
-        ai = call_gemini_categorize(task.text, task.mood, task.energy)
+        ai = await call_gemini_categorize(task.text, task.mood, task.energy)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI error: {str(e)[:100]}")
 
-    data = Task(
+    # No re-validation: user fields were validated by TaskInput, and AI fields are either
+    # heuristic output or Gemini values that passed _merge_ai_fields' schema checks
+    return Task.model_construct(
         text=task.text,
         category=ai.get("category"),
         energy=ai.get("energy"),
@@ -118,40 +335,131 @@ def create_task(task: TaskInput):
         mood=task.mood,
         user_energy=task.energy,
     )
-    inserted_id = create_document("task", data)
-    return {"id": inserted_id, "task": data.model_dump()}
+
+def encode_task(task: Task) -> dict:
+    """Task as a Mongo document, with category/energy fields stored as int codes."""
+    doc = task.model_dump()
+    doc["category"] = CATEGORY_CODES.get(doc["category"], doc["category"])
+    doc["energy"] = ENERGY_CODES.get(doc["energy"], doc["energy"])
+    doc["user_energy"] = ENERGY_CODES.get(doc["user_energy"], doc["user_energy"])
+    return doc
+
+async def decode_tasks(docs: AsyncIterable[dict]):
+    """Map stored int codes back to names; documents written before the encoding pass through."""
+    async for d in docs:
+        if "category" in d:
+            d["category"] = CATEGORY_NAMES.get(d["category"], d["category"])
+        if "energy" in d:
+            d["energy"] = ENERGY_NAMES.get(d["energy"], d["energy"])
+        if "user_energy" in d:
+            d["user_energy"] = ENERGY_NAMES.get(d["user_energy"], d["user_energy"])
+        yield d
+
+async def _ndjson_lines(docs: AsyncIterable[dict]):
+    async for d in docs:
+        yield orjson.dumps(d) + b"\n"
+
+async def _json_envelope(key: str, docs: AsyncIterable[dict]):
+    """Emit {"<key>": [...]} incrementally, one document per chunk."""
+    yield b'{"' + key.encode() + b'":['
+    sep = b""
+    async for d in docs:
+        yield sep + orjson.dumps(d)
+        sep = b","
+    yield b"]}"
+
+async def _chain(head: list, rest: AsyncIterable[dict]):
+    for d in head:
+        yield d
+    async for d in rest:
+        yield d
+
+async def stream_list(request: Request, key: str, docs: AsyncIterable[dict]) -> StreamingResponse:
+    """Stream a cursor as NDJSON when the client asks for it, else as the usual JSON envelope.
+
+    The first document is fetched before any headers go out, so a failing query is a plain 500
+    rather than a 200 with a truncated body.
+    """
+    docs = docs.__aiter__()
+    try:
+        head = [await docs.__anext__()]
+    except StopAsyncIteration:
+        head = []
+    docs = _chain(head, docs)
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(_ndjson_lines(docs), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(_json_envelope(key, docs), media_type="application/json")
+
+# --- Routes ---
+
+@app.post("/api/tasks")
+async def create_task(task: TaskInput):
+    """Create a task from natural language, categorize via AI/heuristic, and store.
+
+    With fast_insert the task is queued for the bulk writer and 202 is returned immediately;
+    if the queue is full it falls back to an acknowledged insert.
+    """
+    data = await build_task(task)
+    doc = encode_task(data)
+    status_code = status.HTTP_200_OK
+    if task.fast_insert:
+        try:
+            inserted_id = enqueue_document("task", doc)
+            status_code = status.HTTP_202_ACCEPTED
+        except asyncio.QueueFull:
+            inserted_id = await create_document("task", doc)
+    else:
+        inserted_id = await create_document("task", doc)
+    return ORJSONResponse(
+        {"id": inserted_id, "task": TASK_ADAPTER.dump_python(data, mode="json")},
+        status_code=status_code,
+    )
+
+@app.post("/api/tasks/bulk")
+async def create_tasks_bulk(tasks: List[TaskInput]):
+    """Create up to MAX_BULK_TASKS tasks in a single unordered insert_many."""
+    if len(tasks) > MAX_BULK_TASKS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_TASKS} tasks per request")
+    data = await asyncio.gather(*(build_task(t) for t in tasks))
+    inserted_ids = await create_documents("task", [encode_task(d) for d in data])
+    return ORJSONResponse({"ids": inserted_ids, "tasks": [TASK_ADAPTER.dump_python(d, mode="json") for d in data]})
 
 @app.get("/api/tasks")
-def list_tasks(energy: Optional[str] = None):
-    """List tasks, optionally filtered by energy type, sorted by priority desc."""
+async def list_tasks(request: Request, energy: Optional[str] = None):
+    """List tasks, optionally filtered by energy type, sorted by priority desc.
+
+    Streamed from the cursor; send `Accept: application/x-ndjson` for one task per line.
+    """
     filter_dict = {}
     if energy:
-        filter_dict["energy"] = energy
-    docs = get_documents("task", filter_dict)
-    # Transform ObjectIds to strings
-    for d in docs:
-        if "_id" in d:
-            d["id"] = str(d.pop("_id"))
-    # Sort by priority desc if present
-    docs.sort(key=lambda x: x.get("priority", 0), reverse=True)
-    return {"tasks": docs}
+        if energy in ENERGY_CODES:
+            # Match documents stored before int-coding as well as coded ones
+            filter_dict["energy"] = {"$in": [ENERGY_CODES[energy], energy]}
+        else:
+            filter_dict["energy"] = energy
+    docs = stream_documents("task", filter_dict, sort={"priority": -1})
+    return await stream_list(request, "tasks", decode_tasks(docs))
 
 @app.post("/api/mood")
-def log_mood(mood: MoodInput):
-    data = MoodLog(mood=mood.mood, energy=mood.energy, notes=mood.notes)
-    inserted_id = create_document("moodlog", data)
+async def log_mood(mood: MoodInput):
+    data = MoodLog.model_construct(mood=mood.mood, energy=mood.energy, notes=mood.notes)
+    inserted_id = await create_document("moodlog", data)
     return {"id": inserted_id, "mood": mood.model_dump()}
 
 @app.get("/api/mood")
-def list_mood():
-    docs = get_documents("moodlog", {})
-    for d in docs:
-        if "_id" in d:
-            d["id"] = str(d.pop("_id"))
-    docs.sort(key=lambda x: x.get("created_at", 0), reverse=True)
-    return {"moods": docs}
+async def list_mood(request: Request):
+    docs = stream_documents("moodlog", {}, sort={"created_at": -1})
+    return await stream_list(request, "moods", docs)
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Workers require an import string; each worker runs its own bulk writer and HTTP pool
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+    )
@@ -19,10 +19,19 @@ from datetime import datetime
 
 EnergyLevel = Literal["low", "medium", "high"]
 
+CATEGORIES = ("admin", "deep", "creative", "social", "other")
+
+# Storage codes: task documents keep category/energy/user_energy as small ints
+ENERGY_CODES = {"low": 0, "medium": 1, "high": 2}
+CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORIES)}
+ENERGY_NAMES = {code: name for name, code in ENERGY_CODES.items()}
+CATEGORY_NAMES = {code: name for name, code in CATEGORY_CODES.items()}
+
 class Task(BaseModel):
     """
     Tasks collection schema
     Collection name: "task"
+    Stored with category, energy and user_energy int-coded (CATEGORY_CODES / ENERGY_CODES)
     """
     text: str = Field(..., description="Raw task input from user")
     category: Optional[str] = Field(None, description="AI-detected category: admin, deep, creative, social, other")